@@ -2,42 +2,95 @@
 # HEALTH CHECK SERVER: ENSURES RENDER DEPLOY COMPLETES       #
 ##############################################################
 
+from gevent import monkey
+monkey.patch_all()
+
 import threading
-from flask import Flask, jsonify
+from flask import Flask, Response
 from flask_socketio import SocketIO, emit
+import orjson
 import os
 from collections import deque
 import time
 
+class HealthServerJSON:
+    # orjson behind the json-module interface python-socketio expects (it passes e.g. `separators`).
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
 HEALTHSERVER_APP = Flask(__name__)
 HEALTHSERVER_APP.config['SECRET_KEY'] = 'your-secret-key-here'
-HEALTHSERVER_CONSOLE_SOCKETIO = SocketIO(HEALTHSERVER_APP, cors_allowed_origins="*")
+HEALTHSERVER_CONSOLE_SOCKETIO = SocketIO(HEALTHSERVER_APP, async_mode="gevent", cors_allowed_origins="*", json=HealthServerJSON)
 
 CURRENT_STATUS = "healthy"
 CONSOLE_BUFFER = deque(maxlen=10)
 CONSOLE_LOCK = threading.Lock()
+CONSOLE_PENDING = []
+# orjson-encoded snapshot of the already-flushed CONSOLE_BUFFER lines, rebuilt lazily after either changes.
+CONSOLE_HISTORY_JSON = None
+CONSOLE_FLUSH_SCHEDULED = False
+CONSOLE_FLUSH_DELAY = 0.05
+# Local time offset for console timestamps, taken once at startup (DST changes aren't followed).
+CONSOLE_UTC_OFFSET = time.localtime().tm_gmtoff
 
 def HealthServerLog(message):
-    timestamp = time.strftime("%H:%M:%S")
+    global CONSOLE_FLUSH_SCHEDULED, CONSOLE_HISTORY_JSON
+    seconds = int(time.time()) + CONSOLE_UTC_OFFSET
+    timestamp = f"{seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
     formatted_message = f"[{timestamp}] {message}"
     
     with CONSOLE_LOCK:
         CONSOLE_BUFFER.append(formatted_message)
-        HEALTHSERVER_CONSOLE_SOCKETIO.emit("console_update", {
-            "message": formatted_message,
-            "history": list(CONSOLE_BUFFER)
-        })
+        CONSOLE_HISTORY_JSON = None
+        CONSOLE_PENDING.append(formatted_message)
+        if CONSOLE_FLUSH_SCHEDULED:
+            return
+        CONSOLE_FLUSH_SCHEDULED = True
+    
+    HEALTHSERVER_CONSOLE_SOCKETIO.start_background_task(HealthServerFlushLog, CONSOLE_FLUSH_DELAY)
+
+def HealthServerFlushLog(delay):
+    # Lines logged within `delay` of each other go out as a single emit.
+    global CONSOLE_FLUSH_SCHEDULED, CONSOLE_HISTORY_JSON
+    HEALTHSERVER_CONSOLE_SOCKETIO.sleep(delay)
+    
+    # Emitted under the lock so a client can't connect between the snapshot moving on and this update.
+    with CONSOLE_LOCK:
+        messages = CONSOLE_PENDING.copy()
+        CONSOLE_PENDING.clear()
+        CONSOLE_HISTORY_JSON = None
+        CONSOLE_FLUSH_SCHEDULED = False
+        HEALTHSERVER_CONSOLE_SOCKETIO.emit("console_update", {"messages": messages})
+
+def HealthServerFastHealth(wsgi_app):
+    # Render probes /health every few seconds; answer it before Flask and Socket.IO dispatch.
+    def app(environ, start_response):
+        if environ.get("PATH_INFO") == "/health" and environ.get("REQUEST_METHOD") == "GET":
+            start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(HEALTH_CACHE)))])
+            return [HEALTH_CACHE]
+        return wsgi_app(environ, start_response)
+    return app
+
+HEALTHSERVER_APP.wsgi_app = HealthServerFastHealth(HEALTHSERVER_APP.wsgi_app)
 
 @HEALTHSERVER_APP.route("/health")
 def HEALTHSERVER_ENDPOINT_HEALTH():
-    return jsonify({'status': CURRENT_STATUS})
+    return Response(HEALTH_CACHE, mimetype="application/json")
 
 @HEALTHSERVER_APP.route("/")
 def HEALTHSERVER_ENDPOINT_ROOT():
-    return jsonify({"status": CURRENT_STATUS, "note_for_humans": "See /humans for human-readable information."})
+    return Response(ROOT_CACHE, mimetype="application/json")
 
 @HEALTHSERVER_APP.route("/humans")
 def HEALTHSERVER_ENDPOINT_HUMANS():
+    return Response(HUMANS_CACHE, mimetype="text/html", direct_passthrough=True)
+
+def HealthServerRenderHumans(status):
     return f"""
     <!DOCTYPE HTML>
     <html>
@@ -94,7 +147,7 @@ def HEALTHSERVER_ENDPOINT_HUMANS():
         </head>
         <body>
             <h1>EmailMonitor Health: Humans</h1>
-            <p><strong>STATUS: <code class="inline-code">{CURRENT_STATUS}</code></strong></p>
+            <p><strong>STATUS: <code class="inline-code">{status}</code></strong></p>
             
             <div class="top-right-text">
                 <p>Made with &#10084;&#65039; by ItsThatOneJack!</p>
@@ -113,22 +166,34 @@ def HEALTHSERVER_ENDPOINT_HUMANS():
             </p>
             
             <script>
-                const socket = io();
+                const socket = io({{ transports: ['websocket'] }});
                 const consoleDiv = document.getElementById('console');
+                const maxLines = {CONSOLE_BUFFER.maxlen};
+                
+                function appendLine(line) {{
+                    const lineDiv = document.createElement('div');
+                    lineDiv.className = 'console-line';
+                    lineDiv.textContent = line;
+                    consoleDiv.appendChild(lineDiv);
+                }}
                 
                 socket.on('connect', function() {{
                     console.log('Connected to server');
                 }});
                 
-                socket.on('console_update', function(data) {{
-                    // Clear and update with full history
+                socket.on('console_snapshot', function(historyJson) {{
+                    // Replace contents once with the server's buffered history
                     consoleDiv.innerHTML = '';
-                    data.history.forEach(function(line) {{
-                        const lineDiv = document.createElement('div');
-                        lineDiv.className = 'console-line';
-                        lineDiv.textContent = line;
-                        consoleDiv.appendChild(lineDiv);
-                    }});
+                    JSON.parse(new TextDecoder().decode(historyJson)).forEach(appendLine);
+                    consoleDiv.scrollTop = consoleDiv.scrollHeight;
+                }});
+                
+                socket.on('console_update', function(data) {{
+                    // Append only the new lines, dropping the oldest past maxLines
+                    (data.messages || [data.line]).forEach(appendLine);
+                    while (consoleDiv.childElementCount > maxLines) {{
+                        consoleDiv.removeChild(consoleDiv.firstChild);
+                    }}
                     
                     // Auto-scroll to bottom
                     consoleDiv.scrollTop = consoleDiv.scrollHeight;
@@ -142,14 +207,29 @@ def HEALTHSERVER_ENDPOINT_HUMANS():
     </html>
     """
 
+def HealthServerSetStatus(status):
+    # Response bodies only change with the status, so render them here rather than per request.
+    global CURRENT_STATUS, HEALTH_CACHE, ROOT_CACHE, HUMANS_CACHE
+    CURRENT_STATUS = status
+    HEALTH_CACHE = orjson.dumps({"status": status})
+    ROOT_CACHE = orjson.dumps({"status": status, "note_for_humans": "See /humans for human-readable information."})
+    HUMANS_CACHE = HealthServerRenderHumans(status).encode()
+
+HealthServerSetStatus(CURRENT_STATUS)
+
 @HEALTHSERVER_CONSOLE_SOCKETIO.on("connect")
 def HEALTHSERVER_CONSOLE_CONNECT():
     print("Client connected!")
+    global CONSOLE_HISTORY_JSON
     with CONSOLE_LOCK:
-        HEALTHSERVER_CONSOLE_SOCKETIO.emit("console_update", {
-            "message": "Connected to live console!",
-            "history": list(CONSOLE_BUFFER)
-        })
+        if CONSOLE_HISTORY_JSON is None:
+            # Still-pending lines reach every client in the next console_update, so leave them out here.
+            flushed = max(0, len(CONSOLE_BUFFER) - len(CONSOLE_PENDING))
+            CONSOLE_HISTORY_JSON = orjson.dumps(list(CONSOLE_BUFFER)[:flushed])
+        history_json = CONSOLE_HISTORY_JSON
+    
+    # Sent as a binary attachment so the cached bytes go out without being re-serialized.
+    emit("console_snapshot", history_json)
 
 @HEALTHSERVER_CONSOLE_SOCKETIO.on("disconnect")
 def HEALTHSERVER_CONSOLE_DISCONNECT():
@@ -157,32 +237,119 @@ def HEALTHSERVER_CONSOLE_DISCONNECT():
 
 def HEALTHSERVER_RUN():
     PORT = int(os.environ.get("PORT", 5000))
-    HEALTHSERVER_CONSOLE_SOCKETIO.run(HEALTHSERVER_APP, host="0.0.0.0", port=PORT, debug=False, allow_unsafe_werkzeug=True)
+    # No per-request access log: the health probes would otherwise flood stderr.
+    HEALTHSERVER_CONSOLE_SOCKETIO.run(HEALTHSERVER_APP, host="0.0.0.0", port=PORT, debug=False, log_output=False)
 
-HEALTHSERVER_THREAD = threading.Thread(target=HEALTHSERVER_RUN)
-HEALTHSERVER_THREAD.daemon = True
-HEALTHSERVER_THREAD.start()
 ##############################################################
 # PROGRAM LOGIC                                              #
 ##############################################################
 
 import imaplib
 import email
+import functools
 import json
+import math
+import orjson
+import queue
+import random
+import re
+import select
+import signal
+import socket
+import ssl
+import threading
 import time
 import requests
-from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta, timezone
+from email.errors import HeaderParseError
 from email.header import decode_header
-from email.utils import parsedate_to_datetime
+from email.iterators import typed_subpart_iterator
+from email.parser import BytesHeaderParser
+from email.policy import default
+from email.utils import getaddresses, parsedate_to_datetime
 import logging
 import os
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Pieces of an untagged UID FETCH response, e.g. `3 (UID 17 INTERNALDATE "..." BODY[HEADER] {512}`
+FETCH_START_RE = re.compile(rb'^\d+ \(')
+FETCH_UID_RE = re.compile(rb'UID (\d+)')
+FETCH_INTERNALDATE_RE = re.compile(rb'INTERNALDATE "[^"]+"')
+FETCH_SECTION_RE = re.compile(rb'BODY\[([A-Z.]*)[^\]]*\](?:<\d+>)? \{\d+\}$')
+
+# Headers needed for the embed, plus the MIME headers needed to find the text part of the body.
+HEADER_FIELDS = 'SUBJECT FROM TO DATE MESSAGE-ID CONTENT-TYPE CONTENT-TRANSFER-ENCODING'
+
+# An untagged LIST response, e.g. `(\HasNoChildren \Sent) "." "INBOX.Sent"`
+LIST_RE = re.compile(rb'\((?P<flags>.*?)\)\s+(?:"(?P<delim>[^"]*)"|NIL)\s+(?P<name>.+)')
+# Webhook replies meaning the payload itself was refused, versus the webhook URL being invalid or deleted.
+PAYLOAD_REJECTED_STATUSES = frozenset({400, 413})
+WEBHOOK_BROKEN_STATUSES = frozenset({401, 403, 404})
+TRUNCATION_MARK = "... (truncated)"
+NOSELECT_FLAGS = frozenset({b'\\noselect', b'\\nonexistent'})
+# Common sent folder names, for servers that don't flag it with SPECIAL-USE.
+SENT_NAMES = frozenset({
+    'Sent', 'Sent Items', 'Sent Messages', 'Sent Mail',
+    'INBOX.Sent', 'INBOX/Sent', 'INBOX.Sent Items', 'INBOX.Sent Messages',
+    'Gesendet', 'Gesendete Elemente', 'Gesendete Objekte',
+    'Elementos enviados', 'Enviados', 'Verzonden', 'Skickat', 'Envoy&AOk-s'
+})
+
+def quote_mailbox(name: str) -> str:
+    """Quote a mailbox name for SELECT/EXAMINE; imaplib sends arguments as-is, so `Sent Items` would otherwise be two."""
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+@functools.lru_cache(maxsize=1024)
+def decode_raw_header(value: str) -> str:
+    """Decode RFC 2047 encoded words in a raw header value."""
+    if not value:
+        return ""
+    
+    decoded_parts = decode_header(value)
+    parts = []
+    
+    for part, encoding in decoded_parts:
+        if isinstance(part, bytes):
+            parts.append(part.decode(encoding or 'utf-8', errors='ignore'))
+        else:
+            parts.append(part)
+    
+    return "".join(parts).strip()
+
+@functools.lru_cache(maxsize=512)
+def format_embed_date(timestamp: int) -> Tuple[str, str]:
+    """Return the (ISO 8601, display) strings for a UTC timestamp in whole seconds."""
+    date_time = datetime.fromtimestamp(timestamp, timezone.utc)
+    return date_time.isoformat(), date_time.strftime("%Y-%m-%d %H:%M:%S UTC")
+
 class EmailMonitor:
+    # Field names and inline flags are the same for every embed; only the values change.
+    EMBED_FIELDS = {
+        'received': (
+            {"name": "From", "inline": True},
+            {"name": "Date", "inline": True},
+            {"name": "Subject", "inline": False},
+            {"name": "Content", "inline": False}
+        ),
+        'sent': (
+            {"name": "To", "inline": True},
+            {"name": "Date", "inline": True},
+            {"name": "Subject", "inline": False},
+            {"name": "Content", "inline": False}
+        )
+    }
+    EMBED_TITLES = {
+        'received': "Received",
+        'sent': "Sent"
+    }
+
     def __init__(self, imap_server: str, imap_port: int, username: str, password: str, 
                  discord_webhook_url: str, check_interval: int = 60):
         self.imap_server = imap_server
@@ -191,11 +358,60 @@ class EmailMonitor:
         self.password = password
         self.discord_webhook_url = discord_webhook_url
         self.check_interval = int(os.environ.get("CHECK_INTERVAL", "60"))
+        # Shared by every IMAP connection so the CA bundle is loaded once, not on each (re)connect.
+        self.ssl_context = ssl.create_default_context()
+        # Servers may drop IDLE sessions after 30 minutes, so re-issue it before then.
+        self.idle_timeout = 29 * 60
+        self.keepalive_interval = 25 * 60
+        # One IMAP connection per watched folder, so INBOX can IDLE while the sent folder is polled.
+        self.connections = {}
+        self.stop_event = threading.Event()
+        # Sent mail older than this when first seen is skipped rather than notified.
+        self.sent_window_seconds = 300
 
-        self.processed_uids = {
-            'INBOX': set(),
-            'SENT': set()
-        }
+        # Per folder: LRU of UIDs already handled, capped at processed_limit.
+        self.processed_uids = {}
+        self.processed_limit = 10_000
+        # (folder, uid) pairs queued for a webhook that hasn't completed yet.
+        self.pending_uids = set()
+        self.uid_validity = {}
+        self.sent_folder = None
+        self.state_lock = threading.Lock()
+        self.state_file = os.environ.get("STATE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "emailmonitor_state.json"))
+        self.load_state()
+        
+        # Keep-alive connections to Discord. The adapter only retries failures to connect, which
+        # can't have delivered anything; a read error may come after Discord accepted the post, so
+        # resending it would duplicate the notification. Rate limits and server errors are handled
+        # in send_discord_webhook.
+        self.http = requests.Session()
+        self.http.headers['Content-Type'] = 'application/json'
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=3,
+                connect=3,
+                read=0,
+                status=0,
+                other=0,
+                backoff_factor=0.5,
+                allowed_methods=None
+            )
+        ))
+        self.max_webhook_attempts = 8
+        # Monotonic time before which Discord has said the rate-limit bucket is empty.
+        self.webhook_ready_at = 0.0
+        
+        # Discord caps a single webhook message at 10 embeds and 6000 characters of embed text,
+        # and each embed field value at 1024 characters.
+        self.max_embeds_per_webhook = 10
+        self.max_embed_chars_per_webhook = 6000
+        self.max_embed_field_chars = 1024
+        
+        self.webhook_queue = queue.Queue(maxsize=1000)
+        for _ in range(2):
+            threading.Thread(target=self.webhook_worker, daemon=True).start()
         
         self.COLORS = {
             'received': 0x00FF00,
@@ -204,250 +420,576 @@ class EmailMonitor:
 
     def connect_imap(self) -> imaplib.IMAP4_SSL:
         try:
-            mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+            mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port, ssl_context=self.ssl_context)
+            # IMAP commands are small request/response writes; don't let Nagle hold them back.
+            mail.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             mail.login(self.username, self.password)
+            
+            # Servers often advertise extensions like SPECIAL-USE only after LOGIN, in its response code.
+            capabilities = mail.response('CAPABILITY')[1][-1]
+            if capabilities:
+                mail.capabilities = tuple(capabilities.decode().upper().split())
+            
             return mail
         except Exception as e:
             logger.error(f"Failed to connect to IMAP server: {e}!")
             HealthServerLog("[ ERR ] IMAP connection failiure!")
             raise
 
-    def decode_header_value(self, value: str) -> str:
-        if not value:
-            return ""
+    def load_state(self) -> None:
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load state from {self.state_file}: {e}")
+            return
         
-        decoded_parts = decode_header(value)
-        decoded_value = ""
+        self.uid_validity = state.get('uid_validity', {})
+        self.sent_folder = state.get('sent_folder')
+        for folder, uids in state.get('processed_uids', {}).items():
+            self.mark_processed(folder, [uid.encode() for uid in uids])
         
-        for part, encoding in decoded_parts:
-            if isinstance(part, bytes):
-                if encoding:
-                    decoded_value += part.decode(encoding)
-                else:
-                    decoded_value += part.decode('utf-8', errors='ignore')
-            else:
-                decoded_value += part
+        logger.info(f"Loaded state from {self.state_file}.")
+
+    def save_state(self) -> None:
+        with self.state_lock:
+            state = {
+                'uid_validity': dict(self.uid_validity),
+                'sent_folder': self.sent_folder,
+                'processed_uids': {
+                    folder: [uid.decode() for uid in uids]
+                    for folder, uids in self.processed_uids.items()
+                }
+            }
         
-        return decoded_value.strip()
+        # Write beside the real file and swap it in, so a crash mid-write never leaves a truncated state.
+        tmp_file = self.state_file + '.tmp'
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            logger.error(f"Could not save state to {self.state_file}: {e}")
+
+    def is_processed(self, folder: str, uid: bytes) -> bool:
+        with self.state_lock:
+            if (folder, uid) in self.pending_uids:
+                return True
+            
+            uids = self.processed_uids.get(folder)
+            if uids is None or uid not in uids:
+                return False
+            
+            # Still-unread INBOX mail shows up in every search; keep it from aging out and re-notifying.
+            uids.move_to_end(uid)
+            return True
+
+    def mark_processed(self, folder: str, uids: Iterable[bytes]) -> None:
+        with self.state_lock:
+            processed = self.processed_uids.setdefault(folder, OrderedDict())
+            for uid in uids:
+                processed[uid] = None
+                processed.move_to_end(uid)
+            while len(processed) > self.processed_limit:
+                processed.popitem(last=False)
 
-    def get_plain_text_content(self, msg: email.message.Message) -> str:
-        content = ""
+    def check_uid_validity(self, mail: imaplib.IMAP4_SSL, folder: str) -> None:
+        """UIDs are only meaningful within one UIDVALIDITY, so forget a folder's UIDs when it changes."""
+        uid_validity = mail.response('UIDVALIDITY')[1][-1]
+        if uid_validity is None:
+            return
         
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == "text/plain":
-                    charset = part.get_content_charset() or 'utf-8'
-                    payload = part.get_payload(decode=True)
-                    if payload:
-                        content += payload.decode(charset, errors='ignore')
+        uid_validity = uid_validity.decode()
+        if self.uid_validity.get(folder) != uid_validity:
+            if folder in self.uid_validity:
+                logger.warning(f"UIDVALIDITY of {folder} changed, forgetting processed UIDs.")
+            with self.state_lock:
+                self.processed_uids.pop(folder, None)
+                self.uid_validity[folder] = uid_validity
+            self.save_state()
+
+    def get_mail(self, folder: str, check_alive: bool = True) -> imaplib.IMAP4_SSL:
+        """Return the cached IMAP connection for `folder`, reconnecting if it no longer answers a NOOP."""
+        mail = self.connections.get(folder)
+        if mail is not None and not check_alive:
+            return mail
+        
+        if mail is not None:
+            try:
+                mail.noop()
+                return mail
+            except (imaplib.IMAP4.abort, OSError) as e:
+                logger.warning(f"IMAP connection for {folder} lost: {e}, reconnecting...")
+                HealthServerLog("[INFORM] IMAP connection lost, reconnecting...")
+                self.close_mail(folder)
+        
+        mail = self.connect_imap()
+        self.connections[folder] = mail
+        return mail
+
+    def close_mail(self, folder: str) -> None:
+        mail = self.connections.pop(folder, None)
+        if mail is None:
+            return
+        
+        try:
+            mail.logout()
+        except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError) as e:
+            logger.debug(f"Error logging out of {folder}: {e}.")
+
+    def header_value(self, hdr: email.message.Message, name: str) -> str:
+        """Decoded value of a header from a policy.default message."""
+        try:
+            return str(hdr.get(name, '')).strip()
+        except (ValueError, TypeError, IndexError, HeaderParseError) as e:
+            # The modern parser can choke on badly malformed headers; decode the raw value instead.
+            logger.debug(f"Could not parse {name} header: {e}.")
+            raw = next((value for key, value in hdr.raw_items() if key.lower() == name.lower()), '')
+            return decode_raw_header(raw)
+
+    def get_plain_text_content(self, msg: email.message.Message, max_content_length: Optional[int] = None) -> str:
+        if max_content_length is None:
+            # Leave room for the truncation marker inside the embed field.
+            max_content_length = self.max_embed_field_chars - len(TRUNCATION_MARK)
+        
+        if msg.get_content_maintype() == 'text':
+            parts = [msg] if msg.get_content_subtype() == 'plain' else []
+        elif msg.is_multipart():
+            # The iterator walks lazily, so nothing past the first inline text/plain part is visited.
+            parts = typed_subpart_iterator(msg, 'text', 'plain')
         else:
-            if msg.get_content_type() == "text/plain":
-                charset = msg.get_content_charset() or 'utf-8'
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    content = payload.decode(charset, errors='ignore')
+            return ""
+        
+        # No charset needs more than 4 bytes per character, so this many bytes always covers the limit.
+        max_payload_bytes = max_content_length * 4
+        
+        for part in parts:
+            if part.get_content_disposition() == 'attachment':
+                continue
+            payload = part.get_payload(decode=True)
+            if not payload:
+                continue
+            
+            charset = part.get_content_charset() or 'utf-8'
+            content = payload[:max_payload_bytes].decode(charset, errors='ignore').strip()
+            if len(content) > max_content_length or len(payload) > max_payload_bytes:
+                content = content[:max_content_length] + TRUNCATION_MARK
+            return content
         
-        return content.strip()
+        return ""
 
     def parse_email_addresses(self, address_string: str) -> List[str]:
-        if not address_string:
-            return []
+        return [addr for _, addr in getaddresses([address_string]) if addr]
+
+    def send_discord_webhook(self, embeds: List[Dict]) -> Optional[int]:
+        """Post embeds, retrying rate limits and server errors. Returns the final HTTP status, or None without one."""
+        payload = {
+            "embeds": embeds
+        }
+        body = orjson.dumps(payload)
         
-        addresses = []
-        for addr in address_string.split(','):
-            addr = addr.strip()
-            if '<' in addr and '>' in addr:
-                addr = addr.split('<')[1].split('>')[0]
-            addresses.append(addr)
+        for attempt in range(self.max_webhook_attempts):
+            try:
+                # Wait out an exhausted bucket instead of spending a request on a 429.
+                delay = self.webhook_ready_at - time.monotonic()
+                if delay > 0 and self.stop_event.wait(delay):
+                    return None
+                
+                response = self.http.post(
+                    self.discord_webhook_url,
+                    data=body,
+                    timeout=(3.05, 10)
+                )
+                
+                if response.headers.get('X-RateLimit-Remaining') == '0':
+                    self.webhook_ready_at = time.monotonic() + float(response.headers.get('X-RateLimit-Reset-After', 0))
+                
+                if response.status_code == 204:
+                    logger.info("Discord webhook sent successfully!")
+                    HealthServerLog("[INFOR] Fired Discord webhook!")
+                    return response.status_code
+                elif response.status_code == 429:
+                    delay = self.retry_after(response) + random.uniform(0, 0.5)
+                    reason = "Discord webhook rate limited"
+                elif response.status_code >= 500:
+                    delay = min(60, 2 ** attempt) + random.uniform(0, 1)
+                    reason = f"Discord webhook failed: {response.status_code}"
+                else:
+                    logger.error(f"Discord webhook failed: {response.status_code} - {response.text}!")
+                    HealthServerLog("[ ERR ] Failied to fire Discord webhook!")
+                    return response.status_code
+                
+            except Exception as e:
+                logger.error(f"Error sending Discord webhook: {e}!")
+                HealthServerLog("[ ERR ] Failied to fire Discord webhook!")
+                return None
+            
+            # Nothing is left to wait for after the last attempt.
+            if attempt == self.max_webhook_attempts - 1:
+                break
+            
+            logger.warning(f"{reason}, retrying in {delay:.1f} seconds...")
+            if self.stop_event.wait(delay):
+                return None
         
-        return addresses
+        logger.error(f"Discord webhook failed after {self.max_webhook_attempts} attempts!")
+        HealthServerLog("[ ERR ] Failied to fire Discord webhook!")
+        return None
 
-    def send_discord_webhook(self, embed_data: Dict) -> bool:
+    def retry_after(self, response: requests.Response) -> float:
+        """Seconds a 429 asks us to wait, from Retry-After or the JSON body; 1 if neither can be read."""
         try:
-            payload = {
-                "embeds": [embed_data]
-            }
-            
-            response = requests.post(
-                self.discord_webhook_url,
-                json=payload,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 204:
-                logger.info("Discord webhook sent successfully!")
-                HealthServerLog("[INFOR] Fired Discord webhook!")
-                return True
-            else:
-                logger.error(f"Discord webhook failed: {response.status_code} - {response.text}!")
-                HealthServerLog("[ ERR ] Failied to fire Discord webhook!")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending Discord webhook: {e}!")
-            HealthServerLog("[ ERR ] Failied to fire Discord webhook!")
-            return False
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            pass
+        
+        try:
+            return float(response.json().get('retry_after', 1))
+        except (ValueError, TypeError, AttributeError):
+            return 1.0
+
+    def queue_webhook(self, folder: str, email_type: str, batch: List[Tuple[bytes, Dict]]) -> None:
+        with self.state_lock:
+            self.pending_uids.update((folder, uid) for uid, _ in batch)
+        self.webhook_queue.put((folder, email_type, batch))
+
+    def webhook_worker(self) -> None:
+        while True:
+            folder, email_type, batch = self.webhook_queue.get()
+            try:
+                done_uids = self.deliver_batch(batch)
+                if done_uids:
+                    logger.info(f"Notification finished for {len(done_uids)} of {len(batch)} {email_type} email(s).")
+                    HealthServerLog(f"[INFORM] Discord webhook fired for {len(done_uids)} {email_type} email(s).")
+                self.finish_webhook(folder, [uid for uid, _ in batch], done_uids)
+            except Exception as e:
+                logger.error(f"Error in webhook worker: {e}")
+                self.finish_webhook(folder, [uid for uid, _ in batch], [])
+            finally:
+                self.webhook_queue.task_done()
+
+    def deliver_batch(self, batch: List[Tuple[bytes, Dict]]) -> List[bytes]:
+        """Send a batch and return the UIDs that are done with: delivered, or rejected by Discord for good."""
+        status = self.send_discord_webhook([embed for _, embed in batch])
+        if status == 204:
+            return [uid for uid, _ in batch]
+        
+        if status in WEBHOOK_BROKEN_STATUSES:
+            # The webhook itself is invalid or gone, not the embeds; keep them for when it's fixed.
+            logger.error(f"Discord webhook is unusable ({status}), check DISCORD_WEBHOOK_URL! Keeping {len(batch)} email(s) for retry.")
+            HealthServerLog("[ ERR ] Discord webhook is unusable, check DISCORD_WEBHOOK_URL!")
+            return []
+        
+        # 429 and 5xx were already retried; only a rejected payload will fail the same way every time.
+        if status not in PAYLOAD_REJECTED_STATUSES:
+            return []
+        
+        if len(batch) == 1:
+            logger.error(f"Discord rejected the notification for UID {batch[0][0].decode()}, skipping it.")
+            HealthServerLog("[ ERR ] Discord rejected a notification, skipping it.")
+            return [batch[0][0]]
+        
+        # One bad embed fails the whole message, so send them one at a time to let the rest through.
+        done_uids = []
+        for item in batch:
+            done_uids.extend(self.deliver_batch([item]))
+        return done_uids
+
+    def finish_webhook(self, folder: str, uids: List[bytes], done_uids: List[bytes]) -> None:
+        """Only delivered or rejected messages count as processed; failed ones are picked up again next check."""
+        with self.state_lock:
+            self.pending_uids.difference_update((folder, uid) for uid in uids)
+        
+        if done_uids:
+            self.mark_processed(folder, done_uids)
+            self.save_state()
+
+    def embed_size(self, embed: Dict) -> int:
+        return (len(embed.get("title", "")) + len(embed.get("footer", {}).get("text", ""))
+                + sum(len(field["name"]) + len(field["value"]) for field in embed["fields"]))
+
+    def batch_embeds(self, items: List[Tuple[bytes, Dict]]) -> List[List[Tuple[bytes, Dict]]]:
+        """Split (uid, embed) pairs into groups that fit in a single webhook message."""
+        batches = []
+        batch = []
+        batch_size = 0
+        
+        for uid, embed in items:
+            size = self.embed_size(embed)
+            if batch and (len(batch) >= self.max_embeds_per_webhook or batch_size + size > self.max_embed_chars_per_webhook):
+                batches.append(batch)
+                batch = []
+                batch_size = 0
+            batch.append((uid, embed))
+            batch_size += size
+        
+        if batch:
+            batches.append(batch)
+        return batches
 
     def create_embed(self, email_type: str, subject: str, sender: str, recipient: str, 
-                    content: str, date_time: datetime) -> Dict:
-        max_content_length = 3000
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "... (truncated)"
+                    content: str, date_time: datetime, message_id: str = "") -> Dict:
+        iso_date, display_date = format_embed_date(int(date_time.timestamp()))
+        values = (
+            sender if email_type == "received" else recipient,
+            display_date,
+            subject or "(No Subject)",
+            content or "(No content)"
+        )
         
         embed = {
+            "title": self.EMBED_TITLES[email_type],
             "color": self.COLORS[email_type],
-            "timestamp": date_time.isoformat(),
-            "fields": []
-        }
-        
-        if email_type == "received":
-            embed["title"] = "Received"
-            embed["fields"] = [
-                {"name": "From", "value": sender, "inline": True},
-                {"name": "Date", "value": date_time.strftime("%Y-%m-%d %H:%M:%S UTC"), "inline": True},
-                {"name": "Subject", "value": subject or "(No Subject)", "inline": False},
-                {"name": "Content", "value": content or "(No content)", "inline": False}
-            ]
-        else:  # sent
-            embed["title"] = "Sent"
-            embed["fields"] = [
-                {"name": "To", "value": recipient, "inline": True},
-                {"name": "Date", "value": date_time.strftime("%Y-%m-%d %H:%M:%S UTC"), "inline": True},
-                {"name": "Subject", "value": subject or "(No Subject)", "inline": False},
-                {"name": "Content", "value": content or "(No content)", "inline": False}
+            "timestamp": iso_date,
+            "fields": [
+                {**field, "value": value[:self.max_embed_field_chars]}
+                for field, value in zip(self.EMBED_FIELDS[email_type], values)
             ]
+        }
+        # Lets a notification delivered twice (e.g. after a lost 2xx) be matched up by hand in Discord.
+        if message_id:
+            embed["footer"] = {"text": message_id[:2048]}
         
         return embed
 
+    def parse_list_response(self, folders: list) -> List[Tuple[bytes, str]]:
+        """Return (flags, name) for each mailbox in a LIST response."""
+        mailboxes = []
+        for folder in folders:
+            literal = None
+            if isinstance(folder, tuple):
+                # Names sent as literals arrive as (b'(flags) "/" {n}', name).
+                folder, literal = folder[0].rsplit(b' ', 1)[0] + b' ""', folder[1]
+            logger.debug(f"Raw folder info: {folder}")
+            
+            match = LIST_RE.match(folder)
+            if not match:
+                continue
+            
+            raw_name = literal if literal is not None else match.group('name').strip()
+            if literal is None and raw_name.startswith(b'"') and raw_name.endswith(b'"'):
+                # Quoted names escape backslashes and double quotes; quote_mailbox adds them back.
+                raw_name = re.sub(rb'\\(.)', rb'\1', raw_name[1:-1])
+            folder_name = raw_name.decode('utf-8', 'ignore')
+            
+            folder_name = folder_name.strip()
+            if folder_name and folder_name != '.':
+                mailboxes.append((match.group('flags'), folder_name))
+        
+        return mailboxes
+
+    def is_selectable(self, flags: bytes) -> bool:
+        return not NOSELECT_FLAGS.intersection(flags.lower().split())
+
     def get_available_folders(self, mail: imaplib.IMAP4_SSL) -> List[str]:
+        """Names of the mailboxes that can actually be selected; \\Noselect hierarchy nodes are left out."""
         try:
             status, folders = mail.list()
             if status != 'OK':
                 return []
             
-            folder_names = []
-            for folder in folders:
-                folder_info = folder.decode('utf-8')
-                logger.debug(f"Raw folder info: {folder_info}")
-                
-                if '"' in folder_info:
-                    parts = folder_info.split('"')
-                    if len(parts) >= 4:
-                        folder_name = parts[-2]
-                    else:
-                        folder_name = parts[-1] if parts else folder_info
-                else:
-                    parts = folder_info.split()
-                    if len(parts) >= 3:
-                        folder_name = parts[-1]
-                    else:
-                        folder_name = folder_info
-                
-                folder_name = folder_name.strip()
-                if folder_name and folder_name != '.':
-                    folder_names.append(folder_name)
-            
-            return folder_names
+            return [name for flags, name in self.parse_list_response(folders) if self.is_selectable(flags)]
         except Exception as e:
             logger.error(f"Error getting folder list: {e}!")
             HealthServerLog("[ ERR ] Failed to get folder list!")
             return []
 
-    def find_sent_folder(self, mail: imaplib.IMAP4_SSL) -> Optional[str]:
-        possible_sent_folders = [
-            'Sent',
-            'INBOX.Sent', 
-            'INBOX/Sent',
-            'Sent Items',
-            'Sent Messages',
-            'INBOX.Sent Items',
-            'INBOX.Sent Messages'
-        ]
-        
-        for folder in possible_sent_folders:
-            try:
-                logger.info(f"Trying to select folder: {folder}...")
-                HealthServerLog(f"[INFORM] Trying to select folder: '{folder}'...")
-                status, count = mail.select(folder, readonly=True)
-                if status == 'OK':
-                    logger.info(f"Successfully found sent folder: {folder}!")
-                    HealthServerLog(f"[INFORM] Found sent folder: '{folder}'!")
-                    return folder
-                else:
-                    logger.debug(f"Could not select {folder}: {status}.")
-            except Exception as e:
-                logger.debug(f"Error trying folder {folder}: {e}.")
+    def find_special_use_folder(self, mail: imaplib.IMAP4_SSL, flag: bytes) -> Optional[str]:
+        """Ask for the RFC 6154 special-use mailboxes in one LIST and return the one flagged `flag`."""
+        if 'SPECIAL-USE' not in mail.capabilities:
+            return None
+        
+        try:
+            status, folders = mail._simple_command('LIST', '(SPECIAL-USE)', '""', '"*"')
+            status, folders = mail._untagged_response(status, folders, 'LIST')
+            if status != 'OK':
+                return None
+            
+            for flags, name in self.parse_list_response(folders):
+                if flag in flags.split() and self.is_selectable(flags):
+                    return name
+        except Exception as e:
+            logger.debug(f"SPECIAL-USE LIST failed: {e}.")
         
         return None
 
+    def find_sent_folder(self, mail: imaplib.IMAP4_SSL, available_folders: List[str]) -> Optional[str]:
+        folder = self.find_special_use_folder(mail, b'\\Sent')
+        if folder:
+            logger.info(f"Server flagged {folder} as the sent folder.")
+            HealthServerLog(f"[INFORM] Found sent folder: '{folder}'!")
+            return folder
+        
+        # Otherwise match the folder list we already have against well-known names.
+        folder = next((name for name in available_folders if name in SENT_NAMES), None)
+        if folder:
+            logger.info(f"Successfully found sent folder: {folder}!")
+            HealthServerLog(f"[INFORM] Found sent folder: '{folder}'!")
+        
+        return folder
+
+    def parse_fetch_response(self, data: list) -> Dict[bytes, Dict[str, bytes]]:
+        """Group a UID FETCH response by UID, e.g. {b'17': {'INTERNALDATE': ..., 'HEADER.FIELDS': ..., 'TEXT': ...}}."""
+        messages = []
+        current = None
+        
+        for item in data:
+            head, literal = item if isinstance(item, tuple) else (item, None)
+            if not head:
+                continue
+            
+            if FETCH_START_RE.match(head):
+                current = {}
+                messages.append(current)
+            if current is None:
+                continue
+            
+            uid = FETCH_UID_RE.search(head)
+            if uid:
+                current['UID'] = uid.group(1)
+            internaldate = FETCH_INTERNALDATE_RE.search(head)
+            if internaldate:
+                current['INTERNALDATE'] = internaldate.group(0)
+            section = FETCH_SECTION_RE.search(head)
+            if section and literal is not None:
+                current[section.group(1).decode()] = literal
+        
+        return {message['UID']: message for message in messages if 'UID' in message}
+
+    def internaldate_to_datetime(self, internaldate: bytes) -> Optional[datetime]:
+        parsed = imaplib.Internaldate2tuple(internaldate)
+        if parsed is None:
+            return None
+        return datetime.fromtimestamp(time.mktime(parsed), timezone.utc)
+
     def check_folder(self, mail: imaplib.IMAP4_SSL, folder: str, email_type: str) -> bool:
         try:
-            status, count = mail.select(folder)
+            status, count = mail.select(quote_mailbox(folder))
             if status != 'OK':
                 logger.warning(f"Could not select folder '{folder}': {status}")
                 return False
             
             logger.info(f"Successfully selected folder '{folder}' with {count[0].decode()} messages.")
             HealthServerLog(f"[INFORM] Found {count[0].decode()} new emails.")
+            self.check_uid_validity(mail, folder)
+            now_utc = datetime.now(timezone.utc)
             
-            if email_type == "received":search_criteria = 'UNSEEN'
-            else:search_criteria = 'ALL'
+            if email_type == "received":
+                search_criteria = ('UNSEEN',)
+            else:
+                # SINCE only has day granularity, so search a whole-day window and filter precisely below.
+                window_days = math.ceil(self.sent_window_seconds / 86400) + 1
+                since = (now_utc - timedelta(days=window_days)).strftime('%d-%b-%Y')
+                search_criteria = ('SINCE', since)
             
-            status, messages = mail.search(None, search_criteria)
+            status, messages = mail.uid('SEARCH', None, *search_criteria)
             
             if status != 'OK':
                 logger.error(f"Failed to search {folder}: {status}")
                 return False
             
-            email_ids = messages[0].split()
-            logger.info(f"Found {len(email_ids)} emails in {folder} (type: {email_type}).")
-            HealthServerLog(f"[INFORM] Found {len(email_ids)} emails in '{folder}'.")
+            email_uids = messages[0].split()
+            logger.info(f"Found {len(email_uids)} emails in {folder} (type: {email_type}).")
+            HealthServerLog(f"[INFORM] Found {len(email_uids)} emails in '{folder}'.")
+            
+            new_uids = [uid for uid in email_uids if not self.is_processed(folder, uid)]
+            if not new_uids:
+                return True
+            
+            # Only the headers the embed and MIME parsing need; PEEK leaves \Seen alone. Every new
+            # INBOX message is wanted, so it comes back whole in one round-trip. Sent mail is first
+            # filtered on INTERNALDATE alone, so stale messages never get downloaded.
+            message_items = f'BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})] BODY.PEEK[TEXT]'
+            fetch_items = 'UID INTERNALDATE'
+            if email_type == "received":
+                fetch_items += f' {message_items}'
+            
+            status, date_data = mail.uid('FETCH', b','.join(new_uids), f'({fetch_items})')
+            if status != 'OK':
+                logger.error(f"Failed to fetch from {folder}: {status}")
+                return False
+            
+            dates = self.parse_fetch_response(date_data)
             
-            for email_id in email_ids:
-                if email_id in self.processed_uids.get(folder, set()):
+            wanted_uids = []
+            arrival_dates = {}
+            stale_uids = []
+            for uid in new_uids:
+                if uid not in dates:
                     continue
                 
-                if folder not in self.processed_uids:
-                    self.processed_uids[folder] = set()
+                arrived = self.internaldate_to_datetime(dates[uid].get('INTERNALDATE', b''))
+                arrival_dates[uid] = arrived
                 
-                status, msg_data = mail.fetch(email_id, '(RFC822)')
+                if email_type == "sent":
+                    if arrived and (now_utc - arrived).total_seconds() > self.sent_window_seconds:
+                        stale_uids.append(uid)
+                        continue
+                
+                wanted_uids.append(uid)
+            
+            if stale_uids:
+                self.mark_processed(folder, stale_uids)
+                self.save_state()
+            
+            if not wanted_uids:
+                return True
+            
+            if email_type == "received":
+                fetched = dates
+            else:
+                # Headers and bodies only for the sent messages that survived the filter, again in one round-trip.
+                status, message_data = mail.uid('FETCH', b','.join(wanted_uids), f'(UID {message_items})')
                 if status != 'OK':
+                    logger.error(f"Failed to fetch messages from {folder}: {status}")
+                    return False
+                
+                fetched = self.parse_fetch_response(message_data)
+            
+            notifications = []
+            for uid in wanted_uids:
+                if uid not in fetched:
                     continue
                 
-                msg = email.message_from_bytes(msg_data[0][1])
+                header_bytes = fetched[uid].get('HEADER.FIELDS', b'')
+                hdr = BytesHeaderParser(policy=default).parsebytes(header_bytes)
                 
-                subject = self.decode_header_value(msg.get('Subject', ''))
-                sender = self.decode_header_value(msg.get('From', ''))
-                recipient = self.decode_header_value(msg.get('To', ''))
-                date_header = msg.get('Date')
+                subject = self.header_value(hdr, 'Subject')
+                message_id = self.header_value(hdr, 'Message-ID')
+                sender = self.header_value(hdr, 'From')
+                recipient = self.header_value(hdr, 'To')
                 
-                try:
-                    email_date = parsedate_to_datetime(date_header)
-                    if email_date.tzinfo is None:
+                # INTERNALDATE is already parsed; only fall back to the Date header without it.
+                email_date = arrival_dates[uid]
+                if email_date is None:
+                    date_header = self.header_value(hdr, 'Date')
+                    try:
+                        email_date = parsedate_to_datetime(date_header) if date_header else None
+                    except (TypeError, ValueError):
+                        email_date = None
+                    
+                    if email_date is None:
+                        email_date = now_utc
+                    elif email_date.tzinfo is None:
                         email_date = email_date.replace(tzinfo=timezone.utc)
-                except:
-                    email_date = datetime.now(timezone.utc)
-                
-                if email_type == "sent":
-                    time_diff = datetime.now(timezone.utc) - email_date
-                    if time_diff.total_seconds() > 300:
-                        self.processed_uids[folder].add(email_id)
-                        continue
                 
+                # The body still needs the top-level Content-Type from the header block to be walked.
+                msg = email.message_from_bytes(header_bytes + fetched[uid].get('TEXT', b''))
                 content = self.get_plain_text_content(msg)
                 
                 if email_type == "received":
-                    embed = self.create_embed("received", subject, sender, "", content, email_date)
+                    embed = self.create_embed("received", subject, sender, "", content, email_date, message_id)
                 else:
                     all_recipients = self.parse_email_addresses(recipient)
                     recipient_str = ", ".join(all_recipients)
-                    embed = self.create_embed("sent", subject, "", recipient_str, content, email_date)
-                
-                if self.send_discord_webhook(embed):
-                    logger.info(f"Notification sent for {email_type} email: {subject}.")
-                    HealthServerLog(f"[INFORM] Discord webhook fired for {email_type} email.")
+                    embed = self.create_embed("sent", subject, "", recipient_str, content, email_date, message_id)
                 
-                self.processed_uids[folder].add(email_id)
+                notifications.append((uid, embed))
+            
+            for batch in self.batch_embeds(notifications):
+                self.queue_webhook(folder, email_type, batch)
             
             return True
             
@@ -455,71 +997,183 @@ class EmailMonitor:
             logger.error(f"Error checking {folder}: {e}")
             return False
 
-    def monitor_emails(self) -> None:
-        """Main monitoring loop."""
-        logger.info("Starting email monitor...")
+    def has_buffered_input(self, mail: imaplib.IMAP4_SSL) -> bool:
+        """Whether imaplib can read more without blocking, counting lines already sitting in `mail.file`.
+        
+        select() only sees the socket, so a second response that arrived in the same read as the
+        first one would otherwise go unnoticed until the next packet.
+        """
+        timeout = mail.sock.gettimeout()
+        mail.sock.setblocking(False)
+        try:
+            return bool(mail.file.peek(1))
+        except (ssl.SSLWantReadError, BlockingIOError):
+            return False
+        finally:
+            mail.sock.settimeout(timeout)
 
-        first_run = True
-        sent_folder = None
+    def idle_wait(self, mail: imaplib.IMAP4_SSL, timeout: float) -> bool:
+        """Block in IDLE on the selected mailbox until it changes or `timeout` seconds pass."""
+        tag = mail._new_tag()
+        mail.tagged_commands.pop(tag, None)
+        mail.send(tag + b" IDLE\r\n")
         
-        while True:
+        response = mail._get_line()
+        if not response.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {response.decode(errors='ignore')}")
+        
+        changed = False
+        deadline = time.monotonic() + timeout
+        while not changed and not self.stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            
+            if not self.has_buffered_input(mail):
+                # Short selects so a shutdown request is noticed within a second.
+                readable, _, _ = select.select([mail.sock], [], [], min(remaining, 1))
+                if not readable:
+                    continue
+            
+            response = mail._get_line()
+            if response.startswith(b"* BYE"):
+                raise imaplib.IMAP4.abort(f"Server closed IDLE: {response.decode(errors='ignore')}")
+            
+            # Anything other than a keepalive ("* OK Still here") means the mailbox changed.
+            changed = not response.startswith(b"* OK")
+        
+        mail.send(b"DONE\r\n")
+        while not mail._get_line().startswith(tag):
+            pass
+        
+        return changed
+
+    def wait_for_next_check(self, mail: imaplib.IMAP4_SSL) -> None:
+        logger.info(f"Waiting {self.check_interval} seconds before next check...")
+        HealthServerLog(f"[INFORM] Waiting {self.check_interval} seconds...")
+        deadline = time.monotonic() + self.check_interval
+        while not self.stop_event.wait(min(self.keepalive_interval, deadline - time.monotonic())):
+            if time.monotonic() >= deadline:
+                break
+            # Keep the connection from hitting the server's idle timeout on long intervals.
+            mail.noop()
+
+    def discover_sent_folder(self) -> Optional[str]:
+        while not self.stop_event.is_set():
             try:
-                mail = self.connect_imap()
+                mail = self.get_mail('INBOX')
                 
-                if first_run:
-                    logger.info("Discovering available folders...")
-                    HealthServerLog(f"[INFORM] Discovering available folders...")
-                    available_folders = self.get_available_folders(mail)
-                    logger.info(f"Available folders: {available_folders}")
-                    HealthServerLog(f"[INFORM] Found: {available_folders}")
-                    
-                    logger.info("Searching for sent folder...")
-                    HealthServerLog(f"[INFORM] Searching for sent folder...")
-                    sent_folder = self.find_sent_folder(mail)
-                    
-                    if sent_folder:
-                        logger.info(f"Found sent folder: {sent_folder}!")
-                        HealthServerLog(f"[INFORM] Found sent folder: '{sent_folder}'!")
-                    else:
-                        logger.warning("No sent folder found, will only monitor inbox.")
-                        HealthServerLog(f"[INFORM] Could not find sent folder. Only received emails will be monitored.")
+                # A folder found on a previous run only needs confirming, not rediscovering.
+                if self.sent_folder:
+                    try:
+                        status, _ = mail.select(quote_mailbox(self.sent_folder), readonly=True)
+                    except imaplib.IMAP4.abort:
+                        raise
+                    except imaplib.IMAP4.error as e:
+                        # A BAD reply is raised rather than returned; either way the name is no good.
+                        logger.debug(f"Could not examine {self.sent_folder}: {e}.")
+                        status = 'BAD'
                     
-                    first_run = False
+                    if status == 'OK':
+                        logger.info(f"Using saved sent folder: {self.sent_folder}.")
+                        return self.sent_folder
+                    logger.warning(f"Saved sent folder {self.sent_folder} is gone, rediscovering...")
+                
+                logger.info("Discovering available folders...")
+                HealthServerLog(f"[INFORM] Discovering available folders...")
+                available_folders = self.get_available_folders(mail)
+                logger.info(f"Available folders: {available_folders}")
+                HealthServerLog(f"[INFORM] Found: {available_folders}")
+                
+                logger.info("Searching for sent folder...")
+                HealthServerLog(f"[INFORM] Searching for sent folder...")
+                self.sent_folder = self.find_sent_folder(mail, available_folders)
+                self.save_state()
+                return self.sent_folder
+                
+            except Exception as e:
+                logger.error(f"Error discovering folders: {e}")
+                HealthServerLog(f"[ ERR ] An error has occured while discovering folders.")
+                self.close_mail('INBOX')
+                HealthServerLog(f"[INFORM] Waiting {self.check_interval} seconds...")
+                self.stop_event.wait(self.check_interval)
+        
+        return None
+
+    def watch_inbox(self) -> None:
+        just_idled = False
+        
+        while not self.stop_event.is_set():
+            try:
+                # A connection that just finished IDLE has already proven it's alive.
+                mail = self.get_mail('INBOX', check_alive=not just_idled)
+                just_idled = False
                 
                 logger.info("Checking INBOX for new emails...")
                 HealthServerLog(f"[INFORM] Looking for received emails...")
                 self.check_folder(mail, 'INBOX', 'received')
                 
-                if sent_folder:
-                    logger.info(f"Checking {sent_folder} for new sent emails...")
-                    HealthServerLog(f"[INFORM] Looking for sent emails....")
-                    self.check_folder(mail, sent_folder, 'sent')
-                
-                try:
-                    mail.close()
-                except:
-                    pass
+                if 'IDLE' in mail.capabilities:
+                    # check_folder left INBOX selected, and nothing else uses this connection.
+                    logger.info(f"Idling on INBOX for up to {self.idle_timeout} seconds...")
+                    HealthServerLog(f"[INFORM] Waiting for new emails...")
+                    self.idle_wait(mail, self.idle_timeout)
+                    just_idled = True
+                    continue
                 
-                mail.logout()
+                self.wait_for_next_check(mail)
                 
-                logger.info(f"Waiting {self.check_interval} seconds before next check...")
+            except Exception as e:
+                logger.error(f"Error in INBOX monitoring loop: {e}")
+                HealthServerLog(f"[ ERR ] An error has occured within the monitoring loop.")
+                self.close_mail('INBOX')
                 HealthServerLog(f"[INFORM] Waiting {self.check_interval} seconds...")
-                time.sleep(self.check_interval)
+                self.stop_event.wait(self.check_interval)
+
+    def poll_sent(self, sent_folder: str) -> None:
+        while not self.stop_event.is_set():
+            try:
+                mail = self.get_mail(sent_folder)
+                
+                logger.info(f"Checking {sent_folder} for new sent emails...")
+                HealthServerLog(f"[INFORM] Looking for sent emails....")
+                self.check_folder(mail, sent_folder, 'sent')
+                
+                self.wait_for_next_check(mail)
                 
-            except KeyboardInterrupt:
-                HealthServerLog(f"[INFORM] Shutting down...")
-                logger.info("Email monitor stopped by user")
-                break
             except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
+                logger.error(f"Error in {sent_folder} monitoring loop: {e}")
                 HealthServerLog(f"[ ERR ] An error has occured within the monitoring loop.")
-                try:
-                    mail.close()
-                    mail.logout()
-                except:
-                    pass
+                self.close_mail(sent_folder)
                 HealthServerLog(f"[INFORM] Waiting {self.check_interval} seconds...")
-                time.sleep(self.check_interval)
+                self.stop_event.wait(self.check_interval)
+
+    def monitor_emails(self) -> None:
+        """Main monitoring loop."""
+        logger.info("Starting email monitor...")
+        
+        sent_folder = self.discover_sent_folder()
+        if sent_folder:
+            logger.info(f"Found sent folder: {sent_folder}!")
+            HealthServerLog(f"[INFORM] Found sent folder: '{sent_folder}'!")
+        else:
+            logger.warning("No sent folder found, will only monitor inbox.")
+            HealthServerLog(f"[INFORM] Could not find sent folder. Only received emails will be monitored.")
+        
+        # INBOX and the sent folder run concurrently, so a slow check of one never delays the other.
+        watchers = [threading.Thread(target=self.watch_inbox)]
+        if sent_folder:
+            watchers.append(threading.Thread(target=self.poll_sent, args=(sent_folder,)))
+        for watcher in watchers:
+            watcher.start()
+        for watcher in watchers:
+            watcher.join()
+        
+        HealthServerLog(f"[INFORM] Shutting down...")
+        logger.info("Email monitor stopped")
+        for folder in list(self.connections):
+            self.close_mail(folder)
+        self.save_state()
 
 def main():
     CONFIG = {
@@ -548,7 +1202,21 @@ def main():
         check_interval=CONFIG['check_interval']
     )
     
-    monitor.monitor_emails()
+    # Render sends SIGTERM before killing the instance; wake the monitor so it can save state.
+    signal.signal(signal.SIGTERM, lambda *_: monitor.stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: monitor.stop_event.set())
+    
+    def run_monitor():
+        try:
+            monitor.monitor_emails()
+        finally:
+            # Once the monitor has shut down, or died, stop serving so the process exits and
+            # /health doesn't keep reporting healthy with nothing running.
+            HEALTHSERVER_CONSOLE_SOCKETIO.stop()
+    
+    # The monitor and the health server share one gevent loop instead of separate OS threads.
+    HEALTHSERVER_CONSOLE_SOCKETIO.start_background_task(run_monitor)
+    HEALTHSERVER_RUN()
 
 if __name__ == "__main__":
     main()